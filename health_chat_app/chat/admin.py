@@ -1,8 +1,14 @@
 # chat/admin.py
 
 from django.contrib import admin
-from .models import Patient, Message, AppointmentChangeRequest
+from .models import Patient, Message, MessageArchive, AppointmentChangeRequest
 
 admin.site.register(Patient)
-admin.site.register(Message)
+admin.site.register(MessageArchive)
 admin.site.register(AppointmentChangeRequest)
+
+# Read-only: cached message bubbles and the chat ETag assume messages never change
+@admin.register(Message)
+class MessageAdmin(admin.ModelAdmin):
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,91 @@
+# chat/archive.py
+
+import gzip
+import json
+from collections import namedtuple
+from datetime import datetime
+from django.db import connection, transaction
+from .models import Message, MessageArchive, Patient
+
+# Read-only view of a message; archived messages are never turned back into rows
+HistoryMessage = namedtuple('HistoryMessage', ['id', 'sender', 'text', 'timestamp'])
+
+# Segment Encoding
+def compress_messages(messages):
+    records = [
+        {
+            'id': msg.id,
+            'sender': msg.sender,
+            'text': msg.text,
+            'timestamp': msg.timestamp.isoformat(),
+        }
+        for msg in messages
+    ]
+    return gzip.compress(json.dumps(records).encode('utf-8'))
+
+def decompress_messages(data):
+    records = json.loads(gzip.decompress(bytes(data)).decode('utf-8'))
+    return [
+        HistoryMessage(
+            id=record['id'],
+            sender=record['sender'],
+            text=record['text'],
+            timestamp=datetime.fromisoformat(record['timestamp']),
+        )
+        for record in records
+    ]
+
+# Compaction
+def archive_messages(patient, cutoff, summarize, batch_size=500):
+    """Fold one batch of the patient's messages older than cutoff into a summarized segment.
+
+    summarize(previous_summary, messages) must return the updated running summary;
+    if it returns nothing the batch stays in the hot table and RuntimeError is raised.
+    Returns the number of messages archived (0 once nothing is left to move, or while
+    another run holds this patient).
+    """
+    with transaction.atomic():
+        # One archiver per patient at a time, so the running summary and the segment
+        # order stay consistent. NO KEY UPDATE keeps new Message inserts unblocked.
+        no_key = connection.features.has_select_for_no_key_update
+        locked = Patient.objects.select_for_update(skip_locked=True, no_key=no_key).filter(pk=patient.pk)
+        if locked.first() is None:
+            return 0
+
+        batch = list(
+            Message.objects.filter(patient=patient, timestamp__lt=cutoff)
+            .order_by('timestamp', 'id')[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        summary = summarize(get_archived_summary(patient), batch)
+        if not summary:
+            raise RuntimeError(f"Could not summarize messages for {patient}; nothing was archived.")
+
+        MessageArchive.objects.create(
+            patient=patient,
+            start_timestamp=batch[0].timestamp,
+            end_timestamp=batch[-1].timestamp,
+            message_count=len(batch),
+            summary=summary,
+            data=compress_messages(batch),
+        )
+        Message.objects.filter(id__in=[msg.id for msg in batch]).delete()
+    return len(batch)
+
+# Read API
+def get_archived_summary(patient):
+    """Return the running summary of everything archived for the patient ('' if nothing is)."""
+    segment = MessageArchive.objects.filter(patient=patient).order_by('-id').only('summary').first()
+    return segment.summary if segment else ""
+
+def get_full_history(patient):
+    """Return archived and hot messages for the patient as HistoryMessage tuples, oldest first."""
+    history = []
+    for segment in MessageArchive.objects.filter(patient=patient):
+        history.extend(decompress_messages(segment.data))
+    hot = Message.objects.filter(patient=patient)
+    history.extend(HistoryMessage(*row) for row in hot.values_list('id', 'sender', 'text', 'timestamp'))
+    # Merge rather than concatenate: a rolled-back run can leave older rows hot
+    return sorted(history, key=lambda msg: (msg.timestamp, msg.id))
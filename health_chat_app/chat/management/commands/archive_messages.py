@@ -0,0 +1,79 @@
+# chat/management/commands/archive_messages.py
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef, Sum
+from django.db.models.functions import Length
+from django.utils import timezone
+from chat.archive import archive_messages
+from chat.models import Message, MessageArchive, Patient
+from chat.utils import summarize_archived_history
+
+class Command(BaseCommand):
+    help = "Fold old messages into a running summary and move them into compressed per-patient archive segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.MESSAGE_ARCHIVE_AGE_DAYS,
+            help="Archive messages older than this many days.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.MESSAGE_ARCHIVE_BATCH_SIZE,
+            help="Maximum number of messages per archive segment.",
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help="Stop after this many segments so compaction can run incrementally.",
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help="Also report hot and archived sizes in bytes (scans both tables).",
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        batch_size = options['batch_size']
+        max_batches = options['max_batches']
+        if days < 1:
+            raise CommandError("--days must be at least 1.")
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if max_batches is not None and max_batches < 1:
+            raise CommandError("--max-batches must be at least 1.")
+
+        cutoff = timezone.now() - timedelta(days=days)
+
+        if options['stats']:
+            self.report("Before")
+
+        batches = 0
+        archived = 0
+        # Per-patient EXISTS so each check can use the (patient, timestamp) index
+        old_messages = Message.objects.filter(patient=OuterRef('pk'), timestamp__lt=cutoff)
+        for patient in Patient.objects.filter(Exists(old_messages)):
+            while max_batches is None or batches < max_batches:
+                try:
+                    count = archive_messages(patient, cutoff, summarize_archived_history, batch_size)
+                except RuntimeError as e:
+                    raise CommandError(f"{e} Archived {archived} messages into {batches} segments before stopping.")
+                if not count:
+                    break
+                batches += 1
+                archived += count
+            if max_batches is not None and batches >= max_batches:
+                break
+
+        self.stdout.write(f"Archived {archived} messages into {batches} segments.")
+        if options['stats']:
+            self.report("After")
+
+    def report(self, label):
+        hot_rows = Message.objects.count()
+        hot_bytes = Message.objects.aggregate(total=Sum(Length('text')))['total'] or 0
+        segments = MessageArchive.objects.count()
+        cold_bytes = MessageArchive.objects.aggregate(total=Sum(Length('data')))['total'] or 0
+        self.stdout.write(
+            f"{label}: {hot_rows} hot messages ({hot_bytes} text bytes), "
+            f"{segments} archive segments ({cold_bytes} compressed bytes)"
+        )
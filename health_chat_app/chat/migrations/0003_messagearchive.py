@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_appointmentchangerequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_timestamp', models.DateTimeField()),
+                ('end_timestamp', models.DateTimeField()),
+                ('message_count', models.PositiveIntegerField()),
+                ('summary', models.TextField()),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['patient', 'timestamp'], name='chat_messag_patient_6cf1ec_idx'),
+        ),
+        migrations.AddField(
+            model_name='messagearchive',
+            name='patient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='chat.patient'),
+        ),
+        migrations.AddIndex(
+            model_name='messagearchive',
+            index=models.Index(fields=['patient', 'start_timestamp'], name='chat_messag_patient_6a01e3_idx'),
+        ),
+    ]
@@ -18,14 +18,35 @@ class Patient(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 class Message(models.Model):
+    # Messages are immutable once written; chat.html caches each bubble by id
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
     sender = models.CharField(max_length=10)  # 'patient' or 'bot'
     text = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['patient', 'timestamp'])]
+
     def __str__(self):
         return f"{self.sender}: {self.text[:50]}"
 
+class MessageArchive(models.Model):
+    # Cold storage for old messages: one gzip-compressed JSON segment per batch
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
+    start_timestamp = models.DateTimeField()
+    end_timestamp = models.DateTimeField()
+    message_count = models.PositiveIntegerField()
+    # Running summary of this and every earlier segment for the patient
+    summary = models.TextField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['patient', 'start_timestamp'])]
+
+    def __str__(self):
+        return f"{self.patient.first_name}: {self.message_count} archived messages up to {self.end_timestamp}"
+
 class AppointmentChangeRequest(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
     requested_time = models.DateTimeField()
@@ -1,3 +1,164 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.utils import timezone
+from .archive import get_archived_summary, get_full_history
+from .models import Patient, Message, MessageArchive, AppointmentChangeRequest
 
-# Create your tests here.
+def create_patient():
+    now = timezone.now()
+    return Patient.objects.create(
+        first_name='Jane', last_name='Doe', date_of_birth='1980-01-01',
+        phone_number='555-0100', email='jane@example.com',
+        medical_condition='Hypertension', medication_regimen='Lisinopril 10mg',
+        last_appointment=now, next_appointment=now + timedelta(days=14),
+        doctor_name='Smith',
+    )
+
+class ArchiveMessagesTests(TestCase):
+    def setUp(self):
+        self.patient = create_patient()
+        # Stand-in for the LLM: the running summary is just the archived texts
+        patcher = mock.patch(
+            'chat.management.commands.archive_messages.summarize_archived_history',
+            side_effect=lambda previous, messages: ' '.join([previous] + [msg.text for msg in messages]).strip(),
+        )
+        self.summarize = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_message(self, text, age_days, sender='patient'):
+        message = Message.objects.create(patient=self.patient, sender=sender, text=text)
+        # timestamp is auto_now_add, so backdate it with an update
+        Message.objects.filter(id=message.id).update(timestamp=timezone.now() - timedelta(days=age_days))
+        return message
+
+    def archive(self, *args):
+        call_command('archive_messages', *args, stdout=StringIO())
+
+    def test_moves_only_messages_older_than_cutoff(self):
+        old = [self.create_message(f"old {i}", 60 - i) for i in range(3)]
+        recent = self.create_message("recent", 1)
+
+        self.archive('--days', '30')
+
+        self.assertEqual(list(Message.objects.values_list('id', flat=True)), [recent.id])
+        segment = MessageArchive.objects.get()
+        self.assertEqual(segment.patient, self.patient)
+        self.assertEqual(segment.message_count, len(old))
+
+    def test_max_batches_stops_after_n_segments(self):
+        for i in range(5):
+            self.create_message(f"old {i}", 60 - i)
+
+        self.archive('--days', '30', '--batch-size', '2', '--max-batches', '1')
+        self.assertEqual(MessageArchive.objects.count(), 1)
+        self.assertEqual(Message.objects.count(), 3)
+
+        self.archive('--days', '30', '--batch-size', '2', '--max-batches', '2')
+        self.assertEqual(MessageArchive.objects.count(), 3)
+        self.assertEqual(Message.objects.count(), 0)
+
+    def test_folds_archived_messages_into_running_summary(self):
+        for i in range(4):
+            self.create_message(f"old{i}", 60 - i)
+
+        self.archive('--days', '30', '--batch-size', '2')
+
+        self.assertEqual(self.summarize.call_count, 2)
+        self.assertEqual(self.summarize.call_args_list[1].args[0], "old0 old1")
+        self.assertEqual(get_archived_summary(self.patient), "old0 old1 old2 old3")
+
+    def test_keeps_messages_hot_when_summary_fails(self):
+        self.create_message("old", 60)
+        self.summarize.side_effect = lambda previous, messages: ""
+
+        with self.assertRaises(CommandError):
+            self.archive('--days', '30')
+        self.assertEqual(Message.objects.count(), 1)
+        self.assertFalse(MessageArchive.objects.exists())
+
+    def test_rejects_non_positive_options(self):
+        self.create_message("old", 60)
+        with self.assertRaises(CommandError):
+            self.archive('--days', '0')
+        with self.assertRaises(CommandError):
+            self.archive('--days', '-1')
+        with self.assertRaises(CommandError):
+            self.archive('--batch-size', '0')
+        with self.assertRaises(CommandError):
+            self.archive('--max-batches', '-1')
+        self.assertEqual(Message.objects.count(), 1)
+
+    def test_full_history_returns_every_message_in_order(self):
+        texts = ["first", "second", "third", "fourth", "fifth"]
+        for i, text in enumerate(texts):
+            self.create_message(text, 60 - i * 10, sender='patient' if i % 2 else 'bot')
+        expected = list(Message.objects.order_by('timestamp').values_list('id', 'sender', 'text', 'timestamp'))
+
+        self.archive('--days', '25', '--batch-size', '2')
+        self.assertEqual(MessageArchive.objects.count(), 2)
+        # A hot row older than archived ones, as left behind by a rolled-back run
+        straggler = self.create_message("straggler", 70)
+        expected.insert(0, Message.objects.values_list('id', 'sender', 'text', 'timestamp').get(id=straggler.id))
+
+        history = get_full_history(self.patient)
+        self.assertEqual([tuple(msg) for msg in history], expected)
+        for msg in history:
+            self.assertTrue(timezone.is_aware(msg.timestamp))
+
+class ChatViewCachingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.patient = create_patient()
+        Message.objects.create(patient=self.patient, sender='patient', text="Hello")
+        self.appointment = AppointmentChangeRequest.objects.create(
+            patient=self.patient, requested_time=timezone.now() + timedelta(days=3),
+        )
+        patcher = mock.patch('chat.views.summarize_conversation', return_value="Summary")
+        self.summarize = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def etag(self):
+        return self.client.get('/')['ETag']
+
+    def test_matching_etag_returns_304_without_summarizing(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.summarize.call_count, 1)
+
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.summarize.call_count, 1)
+
+    def test_sends_private_no_cache(self):
+        cache_control = self.client.get('/')['Cache-Control']
+        self.assertEqual(sorted(part.strip() for part in cache_control.split(',')), ['no-cache', 'private'])
+
+    @mock.patch('chat.views.get_bot_response', return_value="Noted")
+    def test_etag_changes_after_posted_message(self, get_bot_response):
+        before = self.etag()
+        self.client.post('/', {'message': "I feel better"})
+        self.assertNotEqual(self.etag(), before)
+
+    def test_patient_update_changes_etag_and_header(self):
+        response = self.client.get('/')
+        self.assertContains(response, "Dr. Smith")
+
+        Patient.objects.filter(id=self.patient.id).update(doctor_name='Jones')
+
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Dr. Jones")
+        self.assertNotContains(response, "Dr. Smith")
+
+    def test_etag_changes_after_appointment_request_change(self):
+        before = self.etag()
+        AppointmentChangeRequest.objects.filter(id=self.appointment.id).update(
+            requested_time=timezone.now() + timedelta(days=5),
+        )
+        self.assertNotEqual(self.etag(), before)
@@ -5,6 +5,7 @@ import spacy
 from dateutil import parser
 from django.conf import settings
 from .models import AppointmentChangeRequest, Message, Patient  # Ensure Patient is imported
+from .archive import get_archived_summary
 from neo4j import GraphDatabase
 from datetime import datetime
 import dateparser
@@ -147,6 +148,27 @@ def summarize_conversation(messages):
         print(f"Error during summarization: {e}")
         return ""
 
+# Archived History Summarization
+def summarize_archived_history(previous_summary, messages):
+    # Folds a batch of messages that is about to be archived into the running summary
+    conversation = '\n'.join([f"{msg.sender}: {msg.text}" for msg in messages])
+    prompt = f"""
+    Update the summary of an earlier conversation between a patient and an AI health assistant with the additional messages below. Keep every important medical detail, medication, symptom, appointment or concern from both the previous summary and the new messages.
+
+    Previous Summary:
+    {previous_summary or "None"}
+
+    Additional Messages:
+    {conversation}
+
+    Updated Summary:
+    """
+    try:
+        response = llm.predict(prompt)
+        return response.strip()
+    except Exception as e:
+        print(f"Error during archive summarization: {e}")
+        return ""
 
 # Entity Extraction Tool
 def extract_entities(user_input):
@@ -166,6 +188,10 @@ entity_extraction_tool = Tool(
 def get_conversation_history(patient, max_messages=10):
     messages = Message.objects.filter(patient=patient).order_by('-timestamp')[:max_messages]
     conversation = '\n'.join([msg.text for msg in reversed(messages)])
+    # Older messages live in MessageArchive; keep their summary in the context
+    archived_summary = get_archived_summary(patient)
+    if archived_summary:
+        conversation = f"Summary of earlier (archived) conversation: {archived_summary}\n{conversation}"
     memory.save_context({"input": conversation}, {"output": ""})
     return conversation
 
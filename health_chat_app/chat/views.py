@@ -1,9 +1,43 @@
 
 
+import hashlib
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
 from django.shortcuts import render, redirect, HttpResponse
-from .models import Patient, Message, AppointmentChangeRequest
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from .archive import get_archived_summary
+from .models import Patient, Message, MessageArchive, AppointmentChangeRequest
 from .utils import get_bot_response, summarize_conversation
 
+def patient_profile_version(patient):
+    # Changes whenever any profile field does, so it versions the cached header in chat.html
+    profile = [getattr(patient, field.attname) for field in Patient._meta.concrete_fields]
+    return hashlib.sha256(repr(profile).encode('utf-8')).hexdigest()
+
+def chat_etag(request):
+    patient = Patient.objects.first()
+    if not patient:
+        return None
+
+    # Everything chat.html renders: profile, messages, archived summary, pending requests and CSRF token.
+    # Messages are never edited, so the newest id and the count cover the message list.
+    message_state = Message.objects.filter(patient=patient).aggregate(last_id=Max('id'), count=Count('id'))
+    last_segment_id = MessageArchive.objects.filter(patient=patient).aggregate(last_id=Max('id'))['last_id']
+    appointment_state = list(
+        AppointmentChangeRequest.objects.filter(patient=patient, reviewed=False)
+        .order_by('id').values_list('id', 'timestamp', 'requested_time')
+    )
+    # Make sure the CSRF cookie exists now, or the first visit's ETag never matches again
+    get_token(request)
+    state = [
+        patient_profile_version(patient), message_state, last_segment_id, appointment_state,
+        request.META.get('CSRF_COOKIE'),
+    ]
+    return hashlib.sha256(repr(state).encode('utf-8')).hexdigest()
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=chat_etag)
 def chat_view(request):
     patient = Patient.objects.first()
     if not patient:
@@ -30,15 +64,20 @@ def chat_view(request):
     else:
         conversation_summary = ""
 
+    # Messages moved to MessageArchive are only shown through their running summary
+    archived_summary = get_archived_summary(patient)
+
     # Retrieve unreviewed appointment requests
     appointment_requests = AppointmentChangeRequest.objects.filter(patient=patient, reviewed=False)
 
     # Prepare context for the template
     context = {
         'patient': patient,
+        'profile_version': patient_profile_version(patient),
         'messages': messages,
         'appointment_requests': appointment_requests,
         'conversation_summary': conversation_summary,
+        'archived_summary': archived_summary,
     }
     return render(request, 'chat/chat.html', context)
 
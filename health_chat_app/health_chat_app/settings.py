@@ -86,6 +86,20 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Holds the rendered chat.html fragments (one per message plus the patient header)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -135,4 +149,8 @@ import os
 load_dotenv()
 
 # Access environment variables using os.getenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
\ No newline at end of file
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Message archival: messages older than this many days are moved into
+# compressed MessageArchive segments by the archive_messages command
+MESSAGE_ARCHIVE_AGE_DAYS = int(os.getenv("MESSAGE_ARCHIVE_AGE_DAYS", 30))
+MESSAGE_ARCHIVE_BATCH_SIZE = int(os.getenv("MESSAGE_ARCHIVE_BATCH_SIZE", 500))